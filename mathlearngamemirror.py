@@ -5,6 +5,8 @@ import plotly.express as px
 import json
 import dataclasses
 import os
+import copy
+import threading
 import pandas as pd
 
 # PAGE TITLE
@@ -22,6 +24,9 @@ class Problem:
     def correct_answer(self) -> str:
         raise NotImplementedError()
     
+    def make_choices(self) -> list:
+        raise NotImplementedError()
+
     def get_answer(self) -> None:
         raise NotImplementedError()
     
@@ -42,18 +47,19 @@ class SimpleAdditionProblem(Problem):
         apples do they have together?
         """)
         
+    def make_choices(self) -> list:
+        choices = []
+        for _ in range(3):
+            choice = random.randint(1, self.answer + 5)
+            while choice in choices:
+                choice = random.randint(1, self.answer + 5)
+            choices.append(choice)
+        choices.insert(random.randint(0,2), self.answer) # Inserts answer at random location
+        return choices
+
     def get_answer(self, problemkey, multichoice) -> None:
         if multichoice:
-            choices = []
-            for _ in range(3):
-                choice = random.randint(1, self.answer + 5)
-                while choice in choices:
-                    choice = random.randint(1, self.answer + 5)
-                choices.append(choice)
-            st.session_state['choicemasterlist'].append(choices)
-            print(st.session_state['choicemasterlist'])
-            choices.insert(random.randint(0,2), self.answer) # Inserts answer at random location
-            self.user_answer = st.selectbox("Answer", st.session_state['choicemasterlist'][problemkey])
+            self.user_answer = st.selectbox("Answer", st.session_state['choicemasterlist'][problemkey], key = problemkey)
         else:
             self.user_answer = st.number_input('Answer', step=1, key = problemkey)
 
@@ -70,19 +76,20 @@ class LineSlopeProblem(Problem):
         st.write('What is the slope of the line below?')
         st.write(px.line(x=[-10, -5], y=[5, self.m * 5 + 5]))
 
+    def make_choices(self) -> list:
+        choices = []
+        for _ in range(3):
+            choice = random.randint(self.answer - 5, self.answer + 5)
+            while choice in choices:
+                choice = random.randint(self.answer - 5, self.answer + 5)
+            choices.append(choice)
+        choices.insert(random.randint(0,2), self.answer) # Inserts answer at random location
+        return choices
+
     def get_answer(self, problemkey, multichoice) -> None:
         print(self.answer)
         if multichoice:
-            choices = []
-            for _ in range(3):
-                choice = random.randint(self.answer - 5, self.answer + 5)
-                while choice in choices:
-                    choice = random.randint(self.answer - 5, self.answer + 5)
-                choices.append(choice)
-            st.session_state['choicemasterlist'].append(choices)
-            print(st.session_state['choicemasterlist'])
-            choices.insert(random.randint(0,2), self.answer) # Inserts answer at random location
-            self.user_answer = st.selectbox("Answer", st.session_state['choicemasterlist'][problemkey])
+            self.user_answer = st.selectbox("Answer", st.session_state['choicemasterlist'][problemkey], key = problemkey)
         else:
             self.user_answer = st.number_input('Answer', step=1, key = problemkey)
 
@@ -107,19 +114,20 @@ class QuadraticProblem(Problem):
         What are the roots of the equation {a}x^2 + {b}x + {c} = 0
         """)
 
+    def make_choices(self) -> list:
+        choices = []
+        for _ in range(3):
+            choice = {random.randint(-10, 10), random.randint(-10,10)}
+            while choice in choices:
+                choice = {random.randint(-10, 10), random.randint(-10,10)}
+            choices.append(choice)
+        choices.insert(random.randint(0,2), self.answer) # Inserts answer at random location
+        return choices
+
     def get_answer(self, problemkey, multichoice = False) -> None:
         print(self.answer)
         if multichoice:
-            choices = []
-            for _ in range(3):
-                choice = {random.randint(-10, 10), random.randint(-10,10)}
-                while choice in choices:
-                    choice = {random.randint(-10, 10), random.randint(-10,10)}
-                choices.append(choice)
-            st.session_state['choicemasterlist'].append(choices)
-            print(st.session_state['choicemasterlist'])
-            choices.insert(random.randint(0,2), self.answer) # Inserts answer at random location
-            self.user_answer = st.selectbox("Answer", st.session_state['choicemasterlist'][problemkey])
+            self.user_answer = st.selectbox("Answer", st.session_state['choicemasterlist'][problemkey], key = problemkey)
         else:
             self.user_answer = {
                 st.number_input('Answer', step=1, key = problemkey), 
@@ -135,6 +143,15 @@ def generate_problems(problemClass):
     print(st.session_state)
 
 
+def generate_choices(multichoice = False):
+    # MULTI-CHOICE OPTIONS ARE BUILT ONCE PER PROBLEM SET, KEYED BY PROBLEMKEY,
+    # SO RERUNS REUSE THEM INSTEAD OF APPENDING NEW LISTS TO SESSION STATE
+    st.session_state['choicemasterlist'] = {}
+    if multichoice:
+        for problemkey, problem in enumerate(st.session_state['problems']):
+            st.session_state['choicemasterlist'][problemkey] = problem.make_choices()
+
+
 def render_problems(multichoice = False):
     print('Rendering Problems...')
     for problem in st.session_state['problems']:
@@ -160,13 +177,53 @@ class UserData:
     total_problems_by_tag: typing.Dict[str, int]
     problem_history: typing.List[ProblemRecord]
 
+@st.cache_resource
+def get_stats_cache():
+    # PROCESS-WIDE, SHARED BY EVERY SESSION AND RERUN, SO ONLY TOUCHED UNDER ITS LOCK
+    return {'lock': threading.Lock(), 'user_data': None, 'mtime': None, 'size': None, 'avoided_parses': 0}
+
+def load_user_data():
+    cache = get_stats_cache()
+    with cache['lock']:
+        if not os.path.exists('data.json'):
+            cache['user_data'] = None
+            return UserData(0, 0, {}, {}, )
+
+        stat = os.stat('data.json')
+        if cache['user_data'] is not None and cache['mtime'] == stat.st_mtime_ns and cache['size'] == stat.st_size:
+            cache['avoided_parses'] += 1
+        else:
+            with open('data.json', "r") as read_file:
+                user_data_dict = json.load(read_file)
+            cache['user_data'] = UserData(**user_data_dict)
+            cache['mtime'] = stat.st_mtime_ns
+            cache['size'] = stat.st_size
+
+        # SHALLOW COPY IS ENOUGH, CALLERS ONLY BUMP THE INT COUNTERS
+        return dataclasses.replace(cache['user_data'])
+
+def save_user_data(user_data):
+    cache = get_stats_cache()
+    with cache['lock']:
+        with open('data.json', 'w') as f:
+            user_data_dict = dataclasses.asdict(user_data)
+            json.dump(user_data_dict, f)
+
+        # OUR OWN WRITE, SO THE IN-MEMORY COPY IS ALREADY UP TO DATE
+        stat = os.stat('data.json')
+        cache['user_data'] = copy.deepcopy(user_data)
+        cache['mtime'] = stat.st_mtime_ns
+        cache['size'] = stat.st_size
+
+def reset_user_data():
+    cache = get_stats_cache()
+    with cache['lock']:
+        if os.path.exists('data.json'):
+            os.remove('data.json')
+        cache['user_data'] = None
+
 # UPDATES USER_DATA TOTAL_PROBLEMS BASED ON NUMBER OF PROBLEMS USER ANSWERED
-if os.path.exists('data.json'):
-    with open('data.json', "r") as read_file:
-        user_data_dict = json.load(read_file)
-        user_data = UserData(**user_data_dict)
-else:
-    user_data = UserData(0, 0, {}, {}, )
+user_data = load_user_data()
 
 if 'stage' not in st.session_state:
     st.session_state.stage = 0
@@ -183,15 +240,16 @@ def update_stats():
     else:
         st.write("Percentage correct:", 0, "%")
 
+    st.caption(f"Stats file parses avoided: {get_stats_cache()['avoided_parses']}")
+
     if st.button("Reset Stats", type = 'primary'): # Reset Stats Button
-        if os.path.exists('data.json'):
-            os.remove('data.json')
+        reset_user_data()
         user_data = UserData(0, 0, {}, {}, )
         st.rerun()
 
 def home():
     st.session_state['generated'] = False
-    st.session_state['choicemasterlist'] = []
+    st.session_state['choicemasterlist'] = {}
     '---'
     st.session_state['multiselect_problems'] = st.multiselect("Choose question type(s)", ["Addition", "Line Slope", "Quadratic"])
     
@@ -239,6 +297,8 @@ if st.session_state.stage == 2:
         if problem.check_answer():
             print("Correct Answer")
             user_data.correct_problems += 1
+    if submitted_problems:
+        save_user_data(user_data)
     st.session_state['problems'] = []
     update_stats()
 
@@ -266,6 +326,7 @@ if st.session_state.stage == 1:
         for _ in range(st.session_state['quadradicproblems']):
             generate_problems(QuadraticProblem())
 
+        generate_choices(st.session_state['multichoice'])
         st.session_state['generated'] = True
         render_problems(st.session_state['multichoice'])    
         st.button('Submit', on_click=set_state, args = [2])
@@ -275,10 +336,6 @@ if st.session_state.stage == 1:
         st.button('Submit', on_click=set_state, args = [2])
 
 
-with open('data.json', 'w') as f:
-    user_data_dict = dataclasses.asdict(user_data)
-    user_data_dict = json.dump(user_data_dict, f)
-
 '''
 ---
 CHANGELOG
@@ -0,0 +1,36 @@
+import copy
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(__file__), "..", "mathlearngamemirror.py")
+
+
+@pytest.mark.slow
+def test_choicemasterlist_stays_flat_over_reruns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # keep data.json out of the repo
+
+    at = AppTest.from_file(APP_PATH, default_timeout=30)
+    at.session_state["stage"] = 1
+    at.session_state["generated"] = False
+    at.session_state["multichoice"] = True
+    at.session_state["additionproblems"] = 2
+    at.session_state["lineslopeproblems"] = 1  # identical unkeyed charts collide
+    at.session_state["quadradicproblems"] = 2
+    at.run()
+    assert not at.exception
+
+    choices = copy.deepcopy(at.session_state["choicemasterlist"])
+    assert len(choices) == 5
+    state_keys = set(at.session_state.keys())
+    state_size = len(at.session_state)
+
+    for _ in range(1000):
+        at.run()
+        assert not at.exception
+        assert len(at.session_state["choicemasterlist"]) == len(choices)
+        assert at.session_state["choicemasterlist"] == choices
+        assert set(at.session_state.keys()) == state_keys
+        assert len(at.session_state) == state_size
+
@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+REPO_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+
+def write_stats(total, correct):
+    with open("data.json", "w") as f:
+        json.dump(
+            {
+                "total_problems": total,
+                "correct_problems": correct,
+                "total_problems_by_tag": {},
+                "problem_history": {},
+            },
+            f,
+        )
+
+
+def avoided_parses(at):
+    for caption in at.caption:
+        if caption.value.startswith("Stats file parses avoided:"):
+            return int(caption.value.rsplit(" ", 1)[1])
+
+
+def shown_total(at):
+    for markdown in at.markdown:
+        if markdown.value.startswith("Total problems:"):
+            return markdown.value
+
+
+@pytest.mark.parametrize("app", ["mathlearngamemirror.py", "v2.py"])
+def test_stats_cache(app, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    st.cache_resource.clear()
+    write_stats(6, 1)
+
+    at = AppTest.from_file(os.path.join(REPO_DIR, app), default_timeout=30)
+    at.run()
+    assert not at.exception
+    first = avoided_parses(at)
+
+    # UNCHANGED FILE IS A CACHE HIT
+    at.run()
+    assert avoided_parses(at) == first + 1
+
+    # EXTERNAL REWRITE WITH A NEW SIZE IS RE-PARSED
+    write_stats(600, 100)
+    at.run()
+    assert avoided_parses(at) == first + 1
+    assert "600" in shown_total(at)
+
+    # RESET STATS CLEARS THE CACHE: A FILE WITH THE SAME SIZE AND MTIME AS
+    # THE CACHED ONE IS STILL RE-PARSED AFTERWARDS
+    stat = os.stat("data.json")
+    next(b for b in at.button if b.label == "Reset Stats").click().run()
+    assert not os.path.exists("data.json")
+    after_reset = avoided_parses(at)
+    write_stats(700, 100)
+    os.utime("data.json", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    at.run()
+    assert avoided_parses(at) == after_reset
+    assert "700" in shown_total(at)
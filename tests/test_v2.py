@@ -0,0 +1,61 @@
+import importlib
+import random
+
+import pytest
+
+
+@pytest.fixture
+def v2(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # importing runs the app in bare mode
+    return importlib.import_module("v2")
+
+
+def random_rollup(v2, seed):
+    rng = random.Random(seed)
+    rollup = {}
+    index = {sort_by: [] for sort_by in v2.ROLLUP_SORTS}
+    for _ in range(2000):
+        name = f"student{rng.randrange(150)}"
+        v2.add_to_rollup(rollup, index, name, rng.random() < 0.6)
+    return rollup, index
+
+
+def test_rollup_indexes_match_full_sort(v2):
+    rollup, index = random_rollup(v2, 0)
+
+    for sort_by in v2.ROLLUP_SORTS:
+        assert index[sort_by] == sorted(
+            v2.get_rollup_sort_key(sort_by, name, row) for name, row in rollup.items()
+        )
+
+
+@pytest.mark.parametrize("descending", [True, False])
+def test_rollup_pages_cover_every_row_once(v2, descending):
+    rollup, index = random_rollup(v2, 1)
+
+    for sort_by in v2.ROLLUP_SORTS:
+        keys = index[sort_by]
+        expected = [key[-1] for key in (keys[::-1] if descending else keys)]
+
+        names = []
+        page = 0
+        while True:
+            rows = v2.get_rollup_page(rollup, keys, descending, page, 25)
+            if not rows:
+                break
+            names += [row["Name"] for row in rows]
+            page += 1
+
+        assert names == expected
+        assert page == -(-len(rollup) // 25)
+
+
+def test_older_rollup_snapshot_is_not_saved(v2, tmp_path):
+    cache = v2.get_class_rollups()
+    cache["saved_version"] = 0
+
+    v2.save_class_rollups(cache, {"by_student": {"new": {}}}, 2)
+    v2.save_class_rollups(cache, {"by_student": {"old": {}}}, 1)
+
+    assert "new" in (tmp_path / "rollups.json").read_text()
+    assert not (tmp_path / "rollups.json.tmp").exists()
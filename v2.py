@@ -5,6 +5,10 @@ import plotly.express as px
 import json
 import dataclasses
 import os
+import copy
+import threading
+import bisect
+import hmac
 import pandas as pd
 
 # PAGE TITLE
@@ -224,19 +228,190 @@ class UserData:
     problem_history: typing.List[ProblemRecord]
 
 
+@st.cache_resource
+def get_stats_cache():
+    # PROCESS-WIDE, SHARED BY EVERY SESSION AND RERUN, SO ONLY TOUCHED UNDER ITS LOCK
+    return {
+        "lock": threading.Lock(),
+        "user_data": None,
+        "mtime": None,
+        "size": None,
+        "avoided_parses": 0,
+    }
+
+
+def load_user_data():
+    cache = get_stats_cache()
+    with cache["lock"]:
+        if not os.path.exists("data.json"):
+            cache["user_data"] = None
+            return UserData(0, 0, {}, {})
+
+        stat = os.stat("data.json")
+        if (
+            cache["user_data"] is not None
+            and cache["mtime"] == stat.st_mtime_ns
+            and cache["size"] == stat.st_size
+        ):
+            cache["avoided_parses"] += 1
+        else:
+            with open("data.json", "r") as read_file:
+                user_data_dict = json.load(read_file)
+            cache["user_data"] = UserData(**user_data_dict)
+            cache["mtime"] = stat.st_mtime_ns
+            cache["size"] = stat.st_size
+
+        # SHALLOW COPY IS ENOUGH, CALLERS ONLY BUMP THE INT COUNTERS
+        return dataclasses.replace(cache["user_data"])
+
+
+def save_user_data(user_data):
+    cache = get_stats_cache()
+    with cache["lock"]:
+        with open("data.json", "w") as f:
+            user_data_dict = dataclasses.asdict(user_data)
+            json.dump(user_data_dict, f)
+
+        # OUR OWN WRITE, SO THE IN-MEMORY COPY IS ALREADY UP TO DATE
+        stat = os.stat("data.json")
+        cache["user_data"] = copy.deepcopy(user_data)
+        cache["mtime"] = stat.st_mtime_ns
+        cache["size"] = stat.st_size
+
+
+def reset_user_data():
+    cache = get_stats_cache()
+    with cache["lock"]:
+        if os.path.exists("data.json"):
+            os.remove("data.json")
+        cache["user_data"] = None
+
+
+# CLASS ROLLUPS
+# PER-STUDENT / PER-TAG / PER-PROBLEM-TYPE TOTALS FOR THE WHOLE CLASS, UPDATED
+# BY submit() SO THE TEACHER VIEW NEVER HAS TO REPLAY ANYONE'S HISTORY
+@dataclasses.dataclass
+class ClassRollups:
+    by_student: typing.Dict[str, typing.Dict[str, int]]
+    by_tag: typing.Dict[str, typing.Dict[str, int]]
+    by_problem_type: typing.Dict[str, typing.Dict[str, int]]
+
+
+def get_rollup_views(rollups):
+    return {
+        "Student": rollups.by_student,
+        "Tag": rollups.by_tag,
+        "Problem Type": rollups.by_problem_type,
+    }
+
+
+ROLLUP_SORTS = ["Accuracy", "Total", "Correct", "Name"]
+
+
+def get_rollup_sort_key(sort_by, name, row):
+    if sort_by == "Accuracy":
+        return (row["correct"] / row["total"], name)
+    if sort_by == "Total":
+        return (row["total"], name)
+    if sort_by == "Correct":
+        return (row["correct"], name)
+    return (name,)
+
+
+@st.cache_resource
+def get_class_rollups():
+    # PROCESS-WIDE, SHARED BY EVERY SESSION, SO ONLY TOUCHED UNDER ITS LOCK.
+    # "indexes" KEEPS ONE SORTED LIST OF KEYS PER VIEW AND SORT, SO A PAGE IS
+    # A SLICE INSTEAD OF A SORT OF THE WHOLE CLASS
+    if os.path.exists("rollups.json"):
+        with open("rollups.json", "r") as read_file:
+            rollups = ClassRollups(**json.load(read_file))
+    else:
+        rollups = ClassRollups({}, {}, {})
+
+    indexes = {
+        view: {
+            sort_by: sorted(
+                get_rollup_sort_key(sort_by, name, row) for name, row in rollup.items()
+            )
+            for sort_by in ROLLUP_SORTS
+        }
+        for view, rollup in get_rollup_views(rollups).items()
+    }
+    return {
+        "lock": threading.Lock(),
+        "rollups": rollups,
+        "indexes": indexes,
+        "version": 0,
+        # DISK WRITES HAVE THEIR OWN LOCK SO THEY NEVER BLOCK DASHBOARD READS
+        "file_lock": threading.Lock(),
+        "saved_version": 0,
+    }
+
+
+def add_to_rollup(rollup, index, name, correct):
+    if name in rollup:
+        row = rollup[name]
+        for sort_by, keys in index.items():
+            keys.pop(bisect.bisect_left(keys, get_rollup_sort_key(sort_by, name, row)))
+    else:
+        row = rollup[name] = {"total": 0, "correct": 0}
+
+    row["total"] += 1
+    if correct:
+        row["correct"] += 1
+    for sort_by, keys in index.items():
+        bisect.insort(keys, get_rollup_sort_key(sort_by, name, row))
+
+
+def save_class_rollups(cache, snapshot, version):
+    # WRITE TO A TEMP FILE AND SWAP IT IN, SO rollups.json IS NEVER LEFT HALF
+    # WRITTEN. A SNAPSHOT OLDER THAN THE LAST ONE SAVED IS DROPPED
+    with cache["file_lock"]:
+        if version <= cache["saved_version"]:
+            return
+        with open("rollups.json.tmp", "w") as f:
+            json.dump(snapshot, f)
+        os.replace("rollups.json.tmp", "rollups.json")
+        cache["saved_version"] = version
+
+
+def get_rollup_page(rollup, keys, descending, page, page_size):
+    if descending:
+        end = max(0, len(keys) - page * page_size)
+        page_keys = keys[max(0, end - page_size) : end][::-1]
+    else:
+        page_keys = keys[page * page_size : (page + 1) * page_size]
+
+    rows = []
+    for key in page_keys:
+        name = key[-1]
+        row = rollup[name]
+        rows.append(
+            {
+                "Name": name,
+                "Total": row["total"],
+                "Correct": row["correct"],
+                "Accuracy": row["correct"] / row["total"] * 100,
+            }
+        )
+    return rows
+
+
+def is_teacher():
+    # THE DASHBOARD IS OPENED WITH ?teacher=<teacher_password FROM st.secrets>
+    try:
+        password = st.secrets.get("teacher_password")
+    except FileNotFoundError:
+        return False
+    given = st.query_params.get("teacher")
+    if not password or given is None:
+        return False
+    return hmac.compare_digest(given.encode(), str(password).encode())
+
+
 # UPDATES USER_DATA TOTAL_PROBLEMS BASED ON NUMBER OF PROBLEMS USER ANSWERED
-if os.path.exists("data.json"):
-    with open("data.json", "r") as read_file:
-        user_data_dict = json.load(read_file)
-        user_data = UserData(**user_data_dict)
-else:
-    user_data = UserData(
-        0,
-        0,
-        {},
-        {},
-        
-    )
+user_data = load_user_data()
 
 if "stage" not in st.session_state:
     st.session_state.stage = 0
@@ -258,9 +433,10 @@ def update_stats():
     else:
         st.write("Percentage correct:", 0, "%")
 
+    st.caption(f"Stats file parses avoided: {get_stats_cache()['avoided_parses']}")
+
     if st.button("Reset Stats", type="primary", key = get_next_st_key()):  # Reset Stats Button
-        if os.path.exists("data.json"):
-            os.remove("data.json")
+        reset_user_data()
         user_data = UserData(
             0,
             0,
@@ -269,6 +445,8 @@ def update_stats():
         )
         st.rerun()
 
+if not st.text_input("Student name", key="student_name").strip():
+    st.caption("Enter your name to be counted on the class dashboard.")
 update_stats()
 
 
@@ -346,21 +524,70 @@ def gen_by_problem():
         
 
 
+def class_dashboard():
+    st.header("Class Dashboard")
+
+    view = st.selectbox("Group by", ["Student", "Tag", "Problem Type"])
+    sort_by = st.selectbox("Sort by", ROLLUP_SORTS)
+    descending = st.checkbox("Descending", value=True)
+    page_size = st.selectbox("Rows per page", [25, 50, 100])
+
+    cache = get_class_rollups()
+    with cache["lock"]:
+        num_pages = max(1, -(-len(cache["indexes"][view][sort_by]) // page_size))
+    page = st.number_input("Page", min_value=1, max_value=num_pages, step=1)
+
+    # RECOUNT UNDER THE SAME LOCK AS THE PAGE, A SUBMIT MAY HAVE ADDED ROWS
+    with cache["lock"]:
+        rollup = get_rollup_views(cache["rollups"])[view]
+        keys = cache["indexes"][view][sort_by]
+        total_rows = len(keys)
+        num_pages = max(1, -(-total_rows // page_size))
+        rows = get_rollup_page(rollup, keys, descending, page - 1, page_size)
+
+    st.dataframe(pd.DataFrame(rows), hide_index=True)
+    st.write("Page", page, "of", num_pages, f"({total_rows} rows)")
+
+
 TABS = [
     ["Random", gen_random_problem_set],
     ["By Problem", gen_by_problem],
     ["Quick Practice", gen_quick_practice],
 ]
 
+if is_teacher():
+    TABS.append(["Class Dashboard", class_dashboard])
+
 
 def submit(problems):
     print("SUBMITTING PROBLEMS")
     print(user_data)
-    for problem in problems:
-        user_data.total_problems += 1
-        if problem.check_answer():
-            print("Correct Answer")
-            user_data.correct_problems += 1
+    cache = get_class_rollups()
+    rollups = cache["rollups"]
+    indexes = cache["indexes"]
+    student = st.session_state["student_name"].strip()
+    with cache["lock"]:
+        for problem in problems:
+            correct = problem.check_answer()
+            user_data.total_problems += 1
+            if correct:
+                print("Correct Answer")
+                user_data.correct_problems += 1
+
+            if student:  # UNNAMED SUBMISSIONS ONLY COUNT TOWARDS TAG AND TYPE
+                add_to_rollup(rollups.by_student, indexes["Student"], student, correct)
+            add_to_rollup(
+                rollups.by_problem_type,
+                indexes["Problem Type"],
+                type(problem).__name__,
+                correct,
+            )
+            for tag in problem.tags:
+                add_to_rollup(rollups.by_tag, indexes["Tag"], tag, correct)
+        cache["version"] += 1
+        version = cache["version"]
+        snapshot = dataclasses.asdict(rollups)
+    save_class_rollups(cache, snapshot, version)
     print(user_data)
 
 
@@ -386,9 +613,7 @@ else:
         submit(st.session_state["problems"])
         del st.session_state["problems"]
 
-        with open("data.json", "w") as f:
-            user_data_dict = dataclasses.asdict(user_data)
-            user_data_dict = json.dump(user_data_dict, f)
+        save_user_data(user_data)
 
         st.rerun()
         